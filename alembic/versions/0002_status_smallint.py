@@ -0,0 +1,66 @@
+"""store veiculos.status as smallint
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 03:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # New integer column filled from the old string column (0 = DESCONECTADO, 1 = CONNECTADO).
+    # SQLite DDL is not transactional: the column may be left over from a failed earlier run.
+    if 'status_code' not in {column['name'] for column in inspector.get_columns('veiculos')}:
+        op.add_column('veiculos', sa.Column('status_code', sa.SmallInteger(), nullable=True))
+    op.execute("UPDATE veiculos SET status_code = CASE status WHEN 'CONNECTADO' THEN 1 ELSE 0 END")
+
+    # Databases created before the baseline (e.g. the bundled veiculos.db) have no check_status
+    has_check_status = 'check_status' in {
+        constraint['name'] for constraint in inspector.get_check_constraints('veiculos')
+    }
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        if has_check_status:
+            batch_op.drop_constraint('check_status', type_='check')
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_code', new_column_name='status', nullable=False)
+        batch_op.create_check_constraint('check_status', 'status IN (0, 1)')
+
+    sa.Enum(name='status_enum').drop(op.get_bind(), checkfirst=True)
+    # SQLite batch mode recreates the table and cannot reflect expression indexes
+    op.create_index('ix_veiculos_placa_lower', 'veiculos', [sa.text('lower(placa)')], unique=True, if_not_exists=True)
+    op.create_index(
+        'ix_veiculos_connected', 'veiculos', ['id'], unique=False,
+        sqlite_where=sa.text('status = 1'),
+        postgresql_where=sa.text('status = 1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_veiculos_connected', table_name='veiculos')
+
+    status_enum = sa.Enum('CONNECTADO', 'DESCONECTADO', name='status_enum')
+    status_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column('veiculos', sa.Column('status_name', status_enum, nullable=True))
+    op.execute("UPDATE veiculos SET status_name = CASE status WHEN 1 THEN 'CONNECTADO' ELSE 'DESCONECTADO' END")
+
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.drop_constraint('check_status', type_='check')
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_name', new_column_name='status', nullable=False)
+        batch_op.create_check_constraint('check_status', "status IN ('CONNECTADO', 'DESCONECTADO')")
+
+    op.create_index('ix_veiculos_placa_lower', 'veiculos', [sa.text('lower(placa)')], unique=True, if_not_exists=True)
@@ -0,0 +1,35 @@
+"""add veiculos.updated_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 04:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Plain ADD COLUMN (no batch): SQLite cannot add a column with a non-constant default,
+    # so new rows get their value from the model and existing rows are backfilled here
+    op.add_column('veiculos', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE veiculos SET updated_at = CURRENT_TIMESTAMP")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    # SQLite batch mode recreates the table and cannot reflect expression indexes
+    op.create_index('ix_veiculos_placa_lower', 'veiculos', [sa.text('lower(placa)')], unique=True, if_not_exists=True)
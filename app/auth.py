@@ -1,33 +1,95 @@
  
 # app/auth.py
 
+import functools
+import hashlib
+import json
+import time
+
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models, schemas, database
+from .cache import get_redis, redis
 
 # Criação de uma senha secreta para geração de tokens
 SECRET_KEY = "sua_chave_secreta"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Chave HMAC preparada uma única vez, reutilizada na emissão e na verificação de todos os tokens
+_signing_key = jwk.construct(SECRET_KEY, ALGORITHM)
+TOKEN_CACHE_TTL_SECONDS = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Argon2id para novas senhas; o bcrypt fica apenas para verificar hashes antigos
+ph = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Cache dos tokens já verificados: evita decodificar o JWT e consultar o usuário a cada request.
+# Primeiro nível local ao processo; o Redis (quando configurado) é o segundo nível entre workers.
+_token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+# Último instante (timestamp) de invalidação de tokens conhecido por este processo, por usuário
+_tokens_invalidated_at: dict[int, int] = {}
+
 # Funções de hash de senha e verificação
+# (são bloqueantes: nos endpoints async devem ser chamadas via run_in_threadpool)
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith("$argon2"):
+        try:
+            return ph.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    # Hashes bcrypt legados ($2a$/$2b$/$2y$). O bcrypt considera só os primeiros 72 bytes da senha
+    # (as versões recentes recusam senhas maiores em vez de truncá-las)
+    try:
+        return bcrypt.checkpw(plain_password.encode()[:72], hashed_password.encode())
+    except ValueError:
+        return False
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return ph.hash(password)
+
+# Hash verificado quando o usuário não existe, para que o tempo de resposta do login
+# não revele quais usernames estão cadastrados. Gerado no primeiro uso (e não na importação
+# do módulo), para que quem só importa auth (ex.: manage_users.py delete) não pague o custo
+@functools.cache
+def _dummy_hash():
+    return ph.hash("x" * 16)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.Usuario).filter(models.Usuario.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+def _verify_dummy_password(plain_password):
+    verify_password(plain_password, _dummy_hash())
+    return False
+
+def password_needs_rehash(hashed_password):
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return ph.check_needs_rehash(hashed_password)
+
+async def get_usuario_by_username(db: AsyncSession, username: str):
+    # lambda_stmt: o SQL compilado fica em cache e é reutilizado entre as chamadas
+    # (login e validação de token a cada request)
+    stmt = lambda_stmt(lambda: select(models.Usuario).where(models.Usuario.username == username))
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_usuario_by_username(db, username)
+    # Sempre executa a verificação, mesmo para usuários inexistentes (tempo constante)
+    if not user:
+        return await run_in_threadpool(_verify_dummy_password, password)
+    if not await run_in_threadpool(verify_password, password, user.hashed_password):
         return False
+    # Migra hashes bcrypt (ou com parâmetros antigos) para Argon2id no login
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await run_in_threadpool(get_password_hash, password)
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -36,28 +98,105 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+def _token_cache_key(token: str):
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+async def _get_cached_token(key: bytes):
+    entry = _token_cache.get(key)
+    if entry is not None:
+        return entry
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(f"jwt:{key.hex()}")
+    except redis.RedisError:
+        return None
+    if raw is None:
+        return None
+    entry = json.loads(raw)
+    _token_cache[key] = entry
+    return entry
+
+async def _tokens_invalidated_since(user_id: int):
+    """
+    Instante (timestamp) da última invalidação dos tokens do usuário, ou None se não houve.
+    Com Redis, inclui as invalidações feitas pelos outros workers; sem ele, cada worker só
+    conhece as próprias, e um token em cache pode ser aceito por até TOKEN_CACHE_TTL_SECONDS
+    nos demais.
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            revoked = await client.get(f"jwt:revoked:{user_id}")
+        except redis.RedisError:
+            revoked = None
+        if revoked is not None:
+            _tokens_invalidated_at[user_id] = max(int(revoked), _tokens_invalidated_at.get(user_id, 0))
+    return _tokens_invalidated_at.get(user_id)
+
+async def _set_cached_token(key: bytes, entry: dict):
+    _token_cache[key] = entry
+    client = get_redis()
+    if client is None:
+        return
+    ttl = min(TOKEN_CACHE_TTL_SECONDS, entry["exp"] - int(time.time()))
+    if ttl <= 0:
+        return
+    try:
+        await client.set(f"jwt:{key.hex()}", json.dumps(entry), ex=ttl)
+    except redis.RedisError:
+        pass
+
+async def invalidate_user_tokens(user_id: int):
+    """
+    Rejeita os tokens do usuário emitidos até agora que ainda estejam em cache, neste processo
+    e (via Redis) nos outros workers. Deve ser chamada ao excluir o usuário.
+    """
+    ts = int(time.time())
+    _tokens_invalidated_at[user_id] = ts
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(f"jwt:revoked:{user_id}", ts, ex=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    except redis.RedisError:
+        pass
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    key = _token_cache_key(token)
+    entry = await _get_cached_token(key)
+    if entry is None:
+        try:
+            payload = jwt.decode(token, _signing_key, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = schemas.TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = schemas.TokenData(username=username)
-    except JWTError:
+        user = await get_usuario_by_username(db, token_data.username)
+        if user is None:
+            raise credentials_exception
+        entry = {"id": user.id, "username": user.username, "iat": payload.get("iat", 0), "exp": payload["exp"]}
+        await _set_cached_token(key, entry)
+    # O cache pode sobreviver ao token ou a uma invalidação: revalida ambos. iat e a invalidação
+    # têm resolução de segundos: um token emitido no mesmo segundo da invalidação também é rejeitado
+    if entry["exp"] <= time.time():
         raise credentials_exception
-    user = db.query(models.Usuario).filter(models.Usuario.username == token_data.username).first()
-    if user is None:
+    invalidated_at = await _tokens_invalidated_since(entry["id"])
+    if invalidated_at is not None and entry["iat"] <= invalidated_at:
         raise credentials_exception
-    return user
+    return schemas.Usuario(id=entry["id"], username=entry["username"])
 
 async def get_current_active_user(current_user: schemas.Usuario = Depends(get_current_user)):
     return current_user
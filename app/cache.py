@@ -0,0 +1,161 @@
+# app/cache.py
+
+import hashlib
+import os
+import time
+from datetime import datetime
+
+from fastapi import Response
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis é opcional: sem ele, apenas os caches locais são usados
+    redis = None
+
+# Configuração do Redis compartilhado entre os workers (ex.: redis://localhost:6379/0)
+REDIS_URL = os.getenv("REDIS_URL")
+
+_redis_client = None
+
+
+# Função para obter o cliente Redis (None quando não configurado)
+def get_redis():
+    global _redis_client
+    if redis is None or not REDIS_URL:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.from_url(REDIS_URL)
+    return _redis_client
+
+
+# Cache de respostas HTTP dos endpoints de leitura de veículos
+
+# Políticas de expiração (em segundos) por endpoint
+VEICULO_CACHE_TTL = 10           # GET /veiculos/{id}
+# Cache-Control de GET /veiculos/{id}: o cliente pode reutilizar a resposta pelo mesmo tempo
+VEICULO_CACHE_CONTROL = {"Cache-Control": f"private, max-age={VEICULO_CACHE_TTL}"}
+VEICULOS_LIST_CACHE_TTL = 30     # GET /veiculos
+# Tempo extra em que uma resposta expirada é mantida para ser servida se o banco estiver fora do ar
+STALE_CACHE_TTL = 300
+
+
+def veiculo_cache_key(veiculo_id: int):
+    return f"veiculo:{veiculo_id}"
+
+
+def veiculos_list_cache_key(skip: int, limit: int):
+    return f"veiculos:list:{skip}:{limit}"
+
+
+# Set com as chaves de listagem em cache: a invalidação apaga só essas chaves, sem varrer o Redis
+VEICULOS_LIST_KEYS = "veiculos:list-keys"
+# Geração do cache de veículos, incrementada a cada invalidação. Uma resposta só é armazenada se
+# a geração não mudou desde antes da consulta ao banco: assim, uma leitura concorrente com uma
+# escrita não devolve ao cache os dados anteriores a ela.
+VEICULOS_CACHE_GEN = "veiculos:gen"
+
+
+async def get_cache_generation():
+    """Geração atual do cache de veículos; deve ser lida antes da consulta ao banco (None sem Redis)."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return int(await client.get(VEICULOS_CACHE_GEN) or 0)
+    except redis.RedisError:
+        return None
+
+
+async def get_cached_response(key: str):
+    """
+    Retorna `{"body", "etag", "stale"}` da resposta armazenada em `key`, ou None.
+    `stale` indica que a resposta já expirou e só deve ser usada como fallback.
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        entry = await client.hgetall(key)
+    except redis.RedisError:
+        return None
+    if not entry:
+        return None
+    return {
+        "body": entry[b"body"],
+        "etag": entry[b"etag"].decode(),
+        "stale": float(entry[b"stale_ts"]) <= time.time(),
+    }
+
+
+def veiculo_etag(veiculo_id: int, updated_at: datetime | None):
+    versao = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0"
+    return f'W/"{veiculo_id}-{versao}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str):
+    """Comparação fraca (RFC 9110) entre o cabeçalho If-None-Match e o ETag atual."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def set_cached_response(key: str, body: bytes, ttl: int, generation: int | None, etag: str | None = None):
+    """
+    Armazena a resposta em `key`, desde que o cache não tenha sido invalidado desde que
+    `generation` (de get_cache_generation) foi lida. Retorna a entrada no formato de get_cached_response.
+    """
+    etag = etag or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    client = get_redis()
+    if client is not None and generation is not None:
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                # WATCH: o EXEC é abortado se uma invalidação incrementar a geração no meio do caminho
+                await pipe.watch(VEICULOS_CACHE_GEN)
+                if int(await pipe.get(VEICULOS_CACHE_GEN) or 0) != generation:
+                    return {"body": body, "etag": etag, "stale": False}
+                pipe.multi()
+                pipe.hset(key, mapping={"body": body, "etag": etag, "stale_ts": time.time() + ttl})
+                pipe.expire(key, ttl + STALE_CACHE_TTL)
+                if key.startswith("veiculos:list:"):
+                    pipe.sadd(VEICULOS_LIST_KEYS, key)
+                    pipe.expire(VEICULOS_LIST_KEYS, ttl + STALE_CACHE_TTL)
+                await pipe.execute()
+        except redis.RedisError:
+            pass
+    return {"body": body, "etag": etag, "stale": False}
+
+
+async def invalidate_veiculos_cache(veiculo_id: int | None = None):
+    """Remove a listagem de veículos (e o veículo `veiculo_id`, se informado) do cache."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        # Incrementa a geração e lê e esvazia o set de chaves de listagem atomicamente (MULTI/EXEC)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.incr(VEICULOS_CACHE_GEN)
+            pipe.smembers(VEICULOS_LIST_KEYS)
+            pipe.delete(VEICULOS_LIST_KEYS)
+            _, keys, _ = await pipe.execute()
+        keys = list(keys)
+        if veiculo_id is not None:
+            keys.append(veiculo_cache_key(veiculo_id))
+        if keys:
+            await client.delete(*keys)
+    except redis.RedisError:
+        pass
+
+
+def cached_response(entry: dict, status: str, headers: dict | None = None):
+    return Response(
+        content=entry["body"],
+        media_type="application/json",
+        headers={"ETag": entry["etag"], "X-Cache": status, **(headers or {})},
+    )
+
+
+def not_modified_response(etag: str, headers: dict | None = None):
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
@@ -1,87 +1,93 @@
 # app/crud.py
 
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import IntegrityError
 from . import models, schemas
-from .auth import pwd_context
+from .auth import get_password_hash, get_usuario_by_username, invalidate_user_tokens
 
 
 # Funções CRUD para Veículos
 
-def get_veiculo(db: Session, veiculo_id: int):
-    return db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
-
-
-def get_veiculo_by_placa(db: Session, placa: str):
-    return db.query(models.Veiculo).filter(models.Veiculo.placa == placa).first()
-
-
-def get_veiculos(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Veiculo).offset(skip).limit(limit).all()
-
-
-def create_veiculo(db: Session, veiculo: schemas.VeiculoCreate):
-    if veiculo.status not in ["CONNECTADO", "DESCONECTADO"]:
-        raise ValueError("Status deve ser 'CONNECTADO' ou 'DESCONECTADO'")
-
-    # Verifica se a placa já existe
-    existing_veiculo = get_veiculo_by_placa(db, veiculo.placa)
-    if existing_veiculo:
-        raise ValueError(f"Veículo com placa '{veiculo.placa}' já existe.")
-
+async def get_veiculo(db: AsyncSession, veiculo_id: int):
+    # Session.get consulta o identity map antes de ir ao banco
+    return await db.get(models.Veiculo, veiculo_id, options=[raiseload("*")])
+
+
+async def get_veiculos(db: AsyncSession, skip: int = 0, limit: int = 100):
+    # Seleciona apenas as colunas: as linhas viram dicts, sem instanciar objetos ORM
+    # (e, portanto, sem risco de lazy loads). Ordenação pela chave primária para que
+    # a paginação seja estável e use o índice.
+    stmt = (
+        select(
+            models.Veiculo.id,
+            models.Veiculo.marca,
+            models.Veiculo.modelo,
+            models.Veiculo.ano,
+            models.Veiculo.placa,
+            models.Veiculo.status,
+        )
+        .order_by(models.Veiculo.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    # Cursor do lado do servidor: as linhas são buscadas em lotes de 200
+    result = await db.stream(stmt.execution_options(yield_per=200))
+    return [dict(row) async for row in result.mappings()]
+
+
+async def create_veiculo(db: AsyncSession, veiculo: schemas.VeiculoCreate):
+    # A unicidade da placa é garantida pelos índices únicos: uma única ida ao banco
     db_veiculo = models.Veiculo(**veiculo.model_dump())
     db.add(db_veiculo)
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
-        raise ValueError(f"Erro ao adicionar veículo com placa '{veiculo.placa}'.")
-    db.refresh(db_veiculo)
+        await db.rollback()
+        raise ValueError(f"Veículo com placa '{veiculo.placa}' já existe.")
+    await db.refresh(db_veiculo)
     return db_veiculo
 
 
-def update_veiculo_status(db: Session, veiculo_id: int, status: str):
-    if status not in ["CONNECTADO", "DESCONECTADO"]:
-        raise ValueError("Status deve ser 'CONNECTADO' ou 'DESCONECTADO'")
-
-    veiculo = get_veiculo(db, veiculo_id)
+async def update_veiculo_status(db: AsyncSession, veiculo_id: int, status: models.StatusVeiculo):
+    veiculo = await get_veiculo(db, veiculo_id)
     if veiculo:
         veiculo.status = status
-        db.commit()
-        db.refresh(veiculo)
+        await db.commit()
+        await db.refresh(veiculo)
     return veiculo
 
 
-def delete_veiculo(db: Session, veiculo_id: int):
-    veiculo = get_veiculo(db, veiculo_id)
+async def delete_veiculo(db: AsyncSession, veiculo_id: int):
+    veiculo = await get_veiculo(db, veiculo_id)
     if veiculo:
-        db.delete(veiculo)
-        db.commit()
+        await db.delete(veiculo)
+        await db.commit()
     return veiculo
 
 
 # Funções CRUD para Usuários
+# (get_usuario_by_username fica em auth, que também o usa no login e na validação do token)
 
-def get_usuario_by_username(db: Session, username: str):
-    return db.query(models.Usuario).filter(models.Usuario.username == username).first()
-
-
-def create_usuario(db: Session, usuario: schemas.UsuarioCreate):
-    existing_user = get_usuario_by_username(db, usuario.username)
+async def create_usuario(db: AsyncSession, usuario: schemas.UsuarioCreate):
+    existing_user = await get_usuario_by_username(db, usuario.username)
     if existing_user:
         raise ValueError(f"Usuário '{usuario.username}' já existe.")
-    hashed_password = pwd_context.hash(usuario.password)
+    hashed_password = await run_in_threadpool(get_password_hash, usuario.password)
     db_usuario = models.Usuario(username=usuario.username, hashed_password=hashed_password)
     db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
+    await db.commit()
+    await db.refresh(db_usuario)
     return db_usuario
 
 
-def delete_usuario(db: Session, usuario_id: int):
-    usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+async def delete_usuario(db: AsyncSession, usuario_id: int):
+    usuario = await db.get(models.Usuario, usuario_id)
     if not usuario:
         raise ValueError(f"Usuário com ID {usuario_id} não encontrado.")
-    db.delete(usuario)
-    db.commit()
+    await db.delete(usuario)
+    await db.commit()
+    await invalidate_user_tokens(usuario_id)
     return usuario
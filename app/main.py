@@ -1,24 +1,30 @@
-from fastapi import Depends, FastAPI, HTTPException
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import List
 from contextlib import asynccontextmanager
-from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from . import models, database, schemas, auth
+from . import models, database, schemas, auth, cache, crud
+from .database import get_db
 from .auth import get_current_active_user, authenticate_user, create_access_token
 
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Inicialização: criar tabelas
-    print("App startup - Inicializando banco de dados...")
-    models.Base.metadata.create_all(bind=database.engine)
+    # Inicialização: o esquema do banco é criado/atualizado pelas migrações do Alembic
+    # ("alembic upgrade head"), executadas antes de subir os workers
+    print("App startup - Inicializando...")
     yield
     # Encerramento
     print("App shutdown - Encerrando...")
+    await database.engine.dispose()
 
 
 app = FastAPI(
@@ -29,18 +35,9 @@ app = FastAPI(
 )
 
 
-# Dependência para obter o banco de dados
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # Endpoint para login e geração de token
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     **Descrição:**
     Endpoint para login e geração de um token JWT.
@@ -85,7 +82,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     token = asyncio.run(get_token("example_user", "example_password"))
     print(token)
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -101,7 +98,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 # Endpoint para criar novos usuários
 @app.post("/usuarios/", response_model=schemas.Usuario)
-def criar_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db)):
+async def criar_usuario(usuario: schemas.UsuarioCreate, db: AsyncSession = Depends(get_db)):
     """
     **Descrição:**
     Cria um novo usuário no sistema. O usuário será criado com uma senha criptografada.
@@ -126,7 +123,7 @@ def criar_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db))
     ```json
     {
         "username": "new_user",
-        "hashed_password": "$2b$12$..."
+        "hashed_password": "$argon2id$v=19$m=65536,t=2,p=1$..."
     }
     ```
 
@@ -145,11 +142,11 @@ def criar_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db))
     user = asyncio.run(create_user("new_user", "new_password"))
     print(user)
     """
-    hashed_password = auth.get_password_hash(usuario.password)
+    hashed_password = await run_in_threadpool(auth.get_password_hash, usuario.password)
     db_usuario = models.Usuario(username=usuario.username, hashed_password=hashed_password)
     db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
+    await db.commit()
+    await db.refresh(db_usuario)
     return db_usuario
 
 
@@ -174,32 +171,45 @@ def read_root():
     return {"message": "Bem-vindo à API de gerenciamento de veículos!"}
 
 
+# Serializador usado para gerar o corpo das respostas de veículo armazenadas em cache
+veiculo_adapter = TypeAdapter(schemas.Veiculo)
+
+
 # Endpoints de veículos - somente usuários autenticados podem acessar
-@app.get("/veiculos", response_model=List[schemas.Veiculo], summary="Listagem de veículos",
-         description="Lista todos os veículos registrados. Requer autenticação.")
-def listar_veiculos(db: Session = Depends(get_db), current_user: schemas.Usuario = Depends(get_current_active_user)):
+@app.get("/veiculos", response_model=schemas.VeiculoPage, summary="Listagem de veículos",
+         description="Lista os veículos registrados, de forma paginada. Requer autenticação.")
+async def listar_veiculos(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: schemas.Usuario = Depends(get_current_active_user)):
     """
     **Descrição:**
-    Lista todos os veículos registrados no sistema.
+    Lista os veículos registrados no sistema, ordenados pelo ID, de forma paginada.
+
+    **Parâmetros:**
+    - `skip`: Quantidade de veículos a pular (int, padrão 0).
+    - `limit`: Quantidade máxima de veículos retornados (int, padrão 100, máximo 500).
 
     **Resposta:**
-    - 200 OK com uma lista de veículos.
+    - 200 OK com a página de veículos e o `skip` da próxima página (`null` na última).
 
     **Exemplo de Resposta:**
 
     ```json
-    [
-        {
-            "id": 1,
-            "placa": "ABC1234",
-            "status": "CONNECTADO"
-        },
-        {
-            "id": 2,
-            "placa": "XYZ5678",
-            "status": "DESCONECTADO"
-        }
-    ]
+    {
+        "items": [
+            {
+                "id": 1,
+                "placa": "ABC1234",
+                "status": "CONNECTADO"
+            },
+            {
+                "id": 2,
+                "placa": "XYZ5678",
+                "status": "DESCONECTADO"
+            }
+        ],
+        "next": null
+    }
     ```
 
     **Exemplo de Implementação em Python:**
@@ -217,14 +227,30 @@ def listar_veiculos(db: Session = Depends(get_db), current_user: schemas.Usuario
     vehicles = asyncio.run(list_vehicles("your_access_token"))
     print(vehicles)
     """
-    veiculos = db.query(models.Veiculo).all()
-    return veiculos
+    chave = cache.veiculos_list_cache_key(skip, limit)
+    cached = await cache.get_cached_response(chave)
+    if cached and not cached["stale"]:
+        return cache.cached_response(cached, "hit")
+    geracao = await cache.get_cache_generation()
+    try:
+        veiculos = await crud.get_veiculos(db, skip=skip, limit=limit)
+    except SQLAlchemyError:
+        # Banco indisponível: serve a última resposta conhecida, se houver
+        if cached:
+            return cache.cached_response(cached, "stale")
+        raise
+    # Devolve a conexão ao pool antes da serialização da resposta
+    await db.close()
+    # As linhas já vêm como dicts com os campos de schemas.Veiculo: serializa direto com orjson
+    body = orjson.dumps({"items": veiculos, "next": skip + limit if len(veiculos) == limit else None})
+    entry = await cache.set_cached_response(chave, body, cache.VEICULOS_LIST_CACHE_TTL, geracao)
+    return cache.cached_response(entry, "miss")
 
 
 @app.post("/veiculos", response_model=schemas.Veiculo, summary="Criação de veículo",
           description="Cria um novo veículo no sistema. A placa deve ser única e o status deve ser 'CONNECTADO' ou 'DESCONECTADO'.")
-def criar_veiculo(veiculo: schemas.VeiculoCreate, db: Session = Depends(get_db),
-                  current_user: schemas.Usuario = Depends(get_current_active_user)):
+async def criar_veiculo(veiculo: schemas.VeiculoCreate, db: AsyncSession = Depends(get_db),
+                        current_user: schemas.Usuario = Depends(get_current_active_user)):
     """
     **Descrição:**
     Cria um novo veículo no sistema. A placa deve ser única e o status deve ser 'CONNECTADO' ou 'DESCONECTADO'.
@@ -269,24 +295,22 @@ def criar_veiculo(veiculo: schemas.VeiculoCreate, db: Session = Depends(get_db),
     vehicle = asyncio.run(create_vehicle("your_access_token", "XYZ1234", "CONNECTADO"))
     print(vehicle)
     """
-    if veiculo.status not in ["CONNECTADO", "DESCONECTADO"]:
-        raise HTTPException(status_code=400,
-                            detail="Status inválido. O status deve ser 'CONNECTADO' ou 'DESCONECTADO'.")
     db_veiculo = models.Veiculo(**veiculo.model_dump())
     try:
         db.add(db_veiculo)
-        db.commit()
-        db.refresh(db_veiculo)
+        await db.commit()
+        await db.refresh(db_veiculo)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Placa já registrada.")
+    await cache.invalidate_veiculos_cache()
     return db_veiculo
 
 
 @app.get("/veiculos/{veiculo_id}", response_model=schemas.Veiculo, summary="Detalhes do veículo",
          description="Obtém os detalhes de um veículo específico pelo ID.")
-def obter_veiculo(veiculo_id: int, db: Session = Depends(get_db),
-                  current_user: schemas.Usuario = Depends(get_current_active_user)):
+async def obter_veiculo(veiculo_id: int, request: Request, db: AsyncSession = Depends(get_db),
+                        current_user: schemas.Usuario = Depends(get_current_active_user)):
     """
     **Descrição:**
     Obtém os detalhes de um veículo específico pelo ID.
@@ -295,13 +319,15 @@ def obter_veiculo(veiculo_id: int, db: Session = Depends(get_db),
     - `veiculo_id`: ID do veículo (int).
 
     **Resposta:**
-    - 200 OK com os dados do veículo.
+    - 200 OK com os dados do veículo e o cabeçalho `ETag` da versão atual.
+    - 304 Not Modified, sem corpo, se o `If-None-Match` enviado corresponder à versão atual.
     - 404 Not Found se o veículo não for encontrado.
 
     **Exemplo de Request:**
 
     ```http
     GET /veiculos/1 HTTP/1.1
+    If-None-Match: W/"1-20241015120000000000"
     ```
 
     **Exemplo de Resposta:**
@@ -329,27 +355,59 @@ def obter_veiculo(veiculo_id: int, db: Session = Depends(get_db),
     vehicle = asyncio.run(get_vehicle("your_access_token", 1))
     print(vehicle)
     """
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
-    if not veiculo:
-        raise HTTPException(status_code=404, detail="Veículo não encontrado")
-    return veiculo
+    if_none_match = request.headers.get("if-none-match")
+    chave = cache.veiculo_cache_key(veiculo_id)
+    cached = await cache.get_cached_response(chave)
+    if cached and not cached["stale"]:
+        if cache.etag_matches(if_none_match, cached["etag"]):
+            return cache.not_modified_response(cached["etag"], cache.VEICULO_CACHE_CONTROL)
+        return cache.cached_response(cached, "hit", cache.VEICULO_CACHE_CONTROL)
+    geracao = await cache.get_cache_generation()
+    try:
+        # Consulta leve (só id e updated_at) para saber se o cliente já tem a versão atual
+        result = await db.execute(
+            select(models.Veiculo.id, models.Veiculo.updated_at).where(models.Veiculo.id == veiculo_id)
+        )
+        versao = result.one_or_none()
+        if not versao:
+            raise HTTPException(status_code=404, detail="Veículo não encontrado")
+        etag = cache.veiculo_etag(versao.id, versao.updated_at)
+        if cache.etag_matches(if_none_match, etag):
+            return cache.not_modified_response(etag, cache.VEICULO_CACHE_CONTROL)
+        veiculo = await db.get(models.Veiculo, veiculo_id, options=[raiseload("*")])
+        # A linha pode ter sido excluída ou alterada entre as duas consultas: o ETag enviado e
+        # armazenado no cache vem sempre da linha carregada
+        if veiculo is None:
+            raise HTTPException(status_code=404, detail="Veículo não encontrado")
+        etag = cache.veiculo_etag(veiculo.id, veiculo.updated_at)
+    except SQLAlchemyError:
+        # Banco indisponível: serve a última resposta conhecida, se houver
+        if cached:
+            return cache.cached_response(cached, "stale", cache.VEICULO_CACHE_CONTROL)
+        raise
+    finally:
+        await db.close()
+    body = veiculo_adapter.dump_json(veiculo_adapter.validate_python(veiculo, from_attributes=True))
+    entry = await cache.set_cached_response(chave, body, cache.VEICULO_CACHE_TTL, geracao, etag=etag)
+    return cache.cached_response(entry, "miss", cache.VEICULO_CACHE_CONTROL)
 
 
 @app.put("/veiculos/{veiculo_id}", response_model=schemas.Veiculo, summary="Atualização de status do veículo",
          description="Atualiza o status de um veículo existente. O status deve ser 'CONNECTADO' ou 'DESCONECTADO'.")
-def atualizar_status(veiculo_id: int, status: str, db: Session = Depends(get_db),
-                     current_user: schemas.Usuario = Depends(get_current_active_user)):
+async def atualizar_status(veiculo_id: int, status: models.StatusVeiculo, db: AsyncSession = Depends(get_db),
+                           current_user: schemas.Usuario = Depends(get_current_active_user)):
     """
     **Descrição:**
     Atualiza o status de um veículo existente. O status deve ser 'CONNECTADO' ou 'DESCONECTADO'.
 
     **Parâmetros:**
     - `veiculo_id`: ID do veículo (int).
-    - `status`: Novo status do veículo (str).
+    - `status`: Novo status do veículo (`CONNECTADO` ou `DESCONECTADO`).
 
     **Resposta:**
     - 200 OK com os dados do veículo atualizado.
     - 404 Not Found se o veículo não for encontrado.
+    - 422 Unprocessable Entity se o status for inválido.
 
     **Exemplo de Request:**
 
@@ -387,22 +445,20 @@ def atualizar_status(veiculo_id: int, status: str, db: Session = Depends(get_db)
     vehicle = asyncio.run(update_vehicle_status("your_access_token", 1, "DESCONECTADO"))
     print(vehicle)
     """
-    if status not in ["CONNECTADO", "DESCONECTADO"]:
-        raise HTTPException(status_code=400,
-                            detail="Status inválido. O status deve ser 'CONNECTADO' ou 'DESCONECTADO'.")
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
+    veiculo = await db.get(models.Veiculo, veiculo_id, options=[raiseload("*")])
     if not veiculo:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
     veiculo.status = status
-    db.commit()
-    db.refresh(veiculo)
+    await db.commit()
+    await db.refresh(veiculo)
+    await cache.invalidate_veiculos_cache(veiculo_id)
     return veiculo
 
 
 @app.delete("/veiculos/{veiculo_id}", summary="Exclusão de veículo",
             description="Remove um veículo do sistema pelo ID.")
-def excluir_veiculo(veiculo_id: int, db: Session = Depends(get_db),
-                    current_user: schemas.Usuario = Depends(get_current_active_user)):
+async def excluir_veiculo(veiculo_id: int, db: AsyncSession = Depends(get_db),
+                          current_user: schemas.Usuario = Depends(get_current_active_user)):
     """
     **Descrição:**
     Remove um veículo do sistema pelo ID.
@@ -443,10 +499,11 @@ def excluir_veiculo(veiculo_id: int, db: Session = Depends(get_db),
     result = asyncio.run(delete_vehicle("your_access_token", 1))
     print(result)
     """
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
+    veiculo = await db.get(models.Veiculo, veiculo_id, options=[raiseload("*")])
     if not veiculo:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
-    db.delete(veiculo)
-    db.commit()
+    await db.delete(veiculo)
+    await db.commit()
+    await cache.invalidate_veiculos_cache(veiculo_id)
     return {"message": "Veículo excluído com sucesso"}
 
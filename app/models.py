@@ -1,8 +1,35 @@
 # app/models.py
 
-from sqlalchemy import Column, Integer, String, CheckConstraint
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, CheckConstraint, Index, func, text
+from sqlalchemy.types import TypeDecorator
 from .database import Base
 
+# Relacionamentos futuros (ex.: Veiculo.proprietario) devem usar back_populates e lazy="raise";
+# as consultas que precisarem deles carregam explicitamente com selectinload()/joinedload().
+
+# Status possíveis de um veículo (validados pelo Pydantic na entrada e pelo banco na gravação)
+class StatusVeiculo(str, enum.Enum):
+    CONNECTADO = "CONNECTADO"
+    DESCONECTADO = "DESCONECTADO"
+
+# Armazena o StatusVeiculo como SMALLINT (0 = DESCONECTADO, 1 = CONNECTADO); no Python e na API
+# o valor continua sendo o enum/string
+class StatusVeiculoType(TypeDecorator):
+    impl = SmallInteger
+    cache_ok = True
+
+    _codigos = {StatusVeiculo.DESCONECTADO: 0, StatusVeiculo.CONNECTADO: 1}
+    _status = {codigo: status for status, codigo in _codigos.items()}
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self._codigos[StatusVeiculo(value)]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self._status[value]
+
 class Veiculo(Base):
     __tablename__ = "veiculos"
 
@@ -11,13 +38,23 @@ class Veiculo(Base):
     modelo = Column(String, index=True)
     ano = Column(Integer)  # Adicionado o campo 'ano'
     placa = Column(String, unique=True, index=True)  # Placa deve ser única
-    status = Column(String, default="DESCONECTADO")
+    status = Column(StatusVeiculoType, nullable=False, default=StatusVeiculo.DESCONECTADO)
+    # Atualizado a cada alteração (precisão de microssegundos); base do ETag de GET /veiculos/{id}
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         CheckConstraint(
-            "status IN ('CONNECTADO', 'DESCONECTADO')",
+            "status IN (0, 1)",
             name="check_status"
         ),
+        # Índice parcial: listar os veículos conectados percorre só as linhas conectadas
+        Index(
+            "ix_veiculos_connected", "id",
+            sqlite_where=text("status = 1"),
+            postgresql_where=text("status = 1"),
+        ),
+        # Impede placas que diferem apenas em maiúsculas/minúsculas
+        Index("ix_veiculos_placa_lower", func.lower(placa), unique=True),
     )
 
 class Usuario(Base):
@@ -1,6 +1,8 @@
 # app/schemas.py
 
-from pydantic import BaseModel, constr, conint, field_validator
+from typing import List
+from pydantic import BaseModel, ConfigDict, constr, conint
+from .models import StatusVeiculo
 
 # Esquema para criação de um novo veículo
 class VeiculoCreate(BaseModel):
@@ -8,13 +10,7 @@ class VeiculoCreate(BaseModel):
     modelo: str
     ano: conint(ge=1886)  # Ano deve ser um inteiro maior ou igual a 1886 (ano do primeiro carro)
     placa: constr(min_length=7, max_length=7)  # Placa deve ter um comprimento fixo, por exemplo 7 caracteres
-    status: str = "DESCONECTADO"  # Valor padrão
-
-    @field_validator('status')
-    def status_must_be_valid(cls, v):
-        if v not in ["CONNECTADO", "DESCONECTADO"]:
-            raise ValueError('Status deve ser "CONNECTADO" ou "DESCONECTADO"')
-        return v
+    status: StatusVeiculo = StatusVeiculo.DESCONECTADO  # Valor padrão
 
 # Esquema para o veículo com ID (usado nas respostas)
 class Veiculo(BaseModel):
@@ -23,10 +19,14 @@ class Veiculo(BaseModel):
     modelo: str
     ano: int
     placa: str
-    status: str
+    status: StatusVeiculo
+
+    model_config = ConfigDict(from_attributes=True)  # Necessário para compatibilidade com SQLAlchemy
 
-    class Config:
-        from_attributes = True  # Necessário para compatibilidade com SQLAlchemy
+# Esquema para a listagem paginada de veículos
+class VeiculoPage(BaseModel):
+    items: List[Veiculo]
+    next: int | None = None  # Valor de `skip` da próxima página (None na última)
 
 # Esquema para autorização de usuários
 class UsuarioBase(BaseModel):
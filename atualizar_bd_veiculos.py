@@ -1,4 +1,68 @@
+import csv
+import re
 import sqlite3
+import sys
+from itertools import islice
+
+# Quantidade de linhas enviadas por executemany na importação de veículos
+TAMANHO_LOTE = 10_000
+
+# Código gravado na coluna veiculos.status (SMALLINT) para cada status
+CODIGOS_STATUS = {"DESCONECTADO": 0, "CONNECTADO": 1}
+
+# Placa no padrão antigo (AAA9999) ou Mercosul (AAA9A99)
+PLACA_RE = re.compile(r"[A-Z]{3}[0-9][A-Z0-9][0-9]{2}")
+# Mesma regra aplicada a um lote inteiro de uma só vez (uma placa por linha)
+_PLACAS_LOTE_RE = re.compile(r"^[A-Z]{3}[0-9][A-Z0-9][0-9]{2}$", re.MULTILINE)
+# Separadores e espaços removidos na normalização (inclui quebras de linha, que quebrariam o lote)
+_SEPARADORES_PLACA = str.maketrans("", "", "- \t\r\n")
+
+
+def normalizar_placa(placa):
+    return placa.translate(_SEPARADORES_PLACA).upper()
+
+
+def placas_invalidas(placas):
+    """
+    Retorna as placas do lote que não seguem o padrão (lista vazia se todas forem válidas).
+    O caso comum é resolvido com uma única varredura da regex sobre o lote inteiro.
+    """
+    if len(_PLACAS_LOTE_RE.findall("\n".join(placas))) == len(placas):
+        return []
+    return [placa for placa in placas if not PLACA_RE.fullmatch(placa)]
+
+
+def importar_veiculos(conn, caminho_csv):
+    """
+    Importa veículos de um CSV com as colunas marca, modelo, ano, placa e status.
+    As placas são normalizadas (sem hífen, em maiúsculas) e validadas por lote.
+    As linhas são inseridas em lotes via executemany, todas numa única transação.
+    """
+    with open(caminho_csv, newline="", encoding="utf-8") as arquivo:
+        linhas = (
+            (
+                linha["marca"],
+                linha["modelo"],
+                int(linha["ano"]),
+                normalizar_placa(linha["placa"] or ""),  # placa ausente (linha curta) é inválida
+                CODIGOS_STATUS[linha.get("status") or "DESCONECTADO"],
+            )
+            for linha in csv.DictReader(arquivo)
+        )
+        total = 0
+        with conn:  # BEGIN ... COMMIT (ou ROLLBACK se algum lote falhar)
+            while lote := list(islice(linhas, TAMANHO_LOTE)):
+                invalidas = placas_invalidas([linha[3] for linha in lote])
+                if invalidas:
+                    raise ValueError(f"{len(invalidas)} placa(s) inválida(s), ex.: {invalidas[:5]}")
+                conn.executemany(
+                    "INSERT INTO veiculos (marca, modelo, ano, placa, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                    lote,
+                )
+                total += len(lote)
+    return total
+
 
 # Conecte-se ao banco de dados SQLite
 conn = sqlite3.connect('veiculos.db')
@@ -9,4 +73,39 @@ cursor.execute("PRAGMA table_info(veiculos);")
 columns = cursor.fetchall()
 print("Colunas atuais:", columns)
 
+# Cria os índices da revisão 0001 do Alembic que faltem em bancos antigos, para que o banco possa
+# ser marcado com "alembic stamp 0001". ix_veiculos_placa_lower impede placas duplicadas ignorando
+# maiúsculas/minúsculas. (A restrição check_status, que o SQLite não consegue adicionar a uma
+# tabela existente, é criada pela migração 0002.)
+INDICES_0001 = {
+    "ix_veiculos_id": "CREATE INDEX IF NOT EXISTS ix_veiculos_id ON veiculos (id);",
+    "ix_veiculos_marca": "CREATE INDEX IF NOT EXISTS ix_veiculos_marca ON veiculos (marca);",
+    "ix_veiculos_modelo": "CREATE INDEX IF NOT EXISTS ix_veiculos_modelo ON veiculos (modelo);",
+    "ix_veiculos_placa": "CREATE UNIQUE INDEX IF NOT EXISTS ix_veiculos_placa ON veiculos (placa);",
+    "ix_veiculos_placa_lower": "CREATE UNIQUE INDEX IF NOT EXISTS ix_veiculos_placa_lower ON veiculos (lower(placa));",
+    "ix_usuarios_id": "CREATE INDEX IF NOT EXISTS ix_usuarios_id ON usuarios (id);",
+    "ix_usuarios_username": "CREATE UNIQUE INDEX IF NOT EXISTS ix_usuarios_username ON usuarios (username);",
+}
+for nome, sql in INDICES_0001.items():
+    try:
+        cursor.execute(sql)
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        print(f"Não foi possível criar o índice {nome} (há valores duplicados?): {e}")
+
+# Importa veículos de um CSV, se informado: python atualizar_bd_veiculos.py veiculos.csv
+# A importação grava direto no banco, sem invalidar o cache do Redis: os veículos importados podem
+# levar até 30s para aparecer em GET /veiculos.
+if len(sys.argv) > 1:
+    # O INSERT usa o esquema atual (status SMALLINT e updated_at): exige as migrações aplicadas
+    if "updated_at" not in [coluna[1] for coluna in columns]:
+        print("Importação cancelada: o banco não está na versão atual. Execute 'alembic upgrade head' "
+              "(veja a seção Database Migrations do README) e tente novamente.")
+    else:
+        try:
+            total = importar_veiculos(conn, sys.argv[1])
+            print(f"{total} veículos importados de '{sys.argv[1]}'.")
+        except (OSError, sqlite3.Error, KeyError, TypeError, ValueError) as e:
+            print(f"Importação cancelada, nenhum veículo foi inserido: {e}")
+
 conn.close()
\ No newline at end of file
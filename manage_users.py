@@ -1,60 +1,88 @@
 # manage_users.py
 
-import argparse
-from sqlalchemy.orm import Session
-from app import crud, database, schemas
-
-
-def main():
-    parser = argparse.ArgumentParser(description="Gerenciar usuários do banco de dados")
-    parser.add_argument("action", choices=["create", "list", "delete"], help="Ação a ser realizada")
-    parser.add_argument("--username", help="Nome de usuário")
-    parser.add_argument("--password", help="Senha do usuário")
-
-    args = parser.parse_args()
-
-    # Usando 'with' para garantir que a sessão será fechada corretamente
-    with database.SessionLocal() as db:
-        try:
-            if args.action == "create":
-                if not args.username or not args.password:
-                    print("Usuário e senha são necessários para criar um novo usuário.")
-                    return
-
-                # Verificando se o usuário já existe
-                existing_user = crud.get_usuario_by_username(db, args.username)
-                if existing_user:
-                    print(f"Usuário '{args.username}' já existe.")
-                    return
-
-                # Criando o usuário
-                usuario = schemas.UsuarioCreate(username=args.username, password=args.password)
-                crud.create_usuario(db, usuario)
-                print(f"Usuário '{args.username}' criado com sucesso.")
-
-            elif args.action == "list":
-                # Listando todos os usuários
-                usuarios = db.query(crud.models.Usuario).all()
-                for usuario in usuarios:
-                    print(f"ID: {usuario.id}, Username: {usuario.username}")
-
-            elif args.action == "delete":
-                if not args.username:
-                    print("Nome de usuário é necessário para excluir um usuário.")
-                    return
-
-                # Verificando se o usuário existe
-                usuario = crud.get_usuario_by_username(db, args.username)
-                if usuario:
-                    # Excluindo o usuário
-                    crud.delete_usuario(db, usuario.id)
-                    print(f"Usuário '{args.username}' excluído com sucesso.")
-                else:
-                    print(f"Usuário '{args.username}' não encontrado.")
-
-        except Exception as e:
-            print(f"Ocorreu um erro: {e}")
+import asyncio
+import sys
+
+import typer
+
+# Os módulos da aplicação (SQLAlchemy, hashing de senhas) são importados dentro de cada
+# comando, para que o CLI só pague o custo de importação do que realmente usa
+cli = typer.Typer(help="Gerenciar usuários do banco de dados")
+
+
+async def _criar_usuario(username: str, password: str):
+    from app import crud, database, schemas
+
+    # Usando 'async with' para garantir que a sessão será fechada corretamente
+    async with database.AsyncSessionLocal() as db:
+        # Verificando se o usuário já existe
+        existing_user = await crud.get_usuario_by_username(db, username)
+        if existing_user:
+            print(f"Usuário '{username}' já existe.")
+        else:
+            # Criando o usuário
+            usuario = schemas.UsuarioCreate(username=username, password=password)
+            await crud.create_usuario(db, usuario)
+            print(f"Usuário '{username}' criado com sucesso.")
+    await database.engine.dispose()
+
+
+async def _listar_usuarios():
+    from sqlalchemy import select
+    from app import database, models
+
+    # Listando todos os usuários (sem importar crud/auth: a listagem não precisa de hashing)
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(models.Usuario.id, models.Usuario.username).order_by(models.Usuario.id))
+        linhas = [f"ID: {id}, Username: {username}" for id, username in result]
+    await database.engine.dispose()
+    if linhas:
+        sys.stdout.write("\n".join(linhas) + "\n")
+
+
+async def _excluir_usuario(username: str):
+    from app import crud, database
+
+    async with database.AsyncSessionLocal() as db:
+        # Verificando se o usuário existe
+        usuario = await crud.get_usuario_by_username(db, username)
+        if usuario:
+            # Excluindo o usuário
+            await crud.delete_usuario(db, usuario.id)
+            print(f"Usuário '{username}' excluído com sucesso.")
+        else:
+            print(f"Usuário '{username}' não encontrado.")
+    await database.engine.dispose()
+
+
+def _executar(coro):
+    try:
+        asyncio.run(coro)
+    except Exception as e:
+        print(f"Ocorreu um erro: {e}")
+
+
+@cli.command("create", help="Cria um novo usuário.")
+def criar(username: str = typer.Option(None, help="Nome de usuário"),
+          password: str = typer.Option(None, help="Senha do usuário")):
+    if not username or not password:
+        print("Usuário e senha são necessários para criar um novo usuário.")
+        return
+    _executar(_criar_usuario(username, password))
+
+
+@cli.command("list", help="Lista os usuários cadastrados.")
+def listar():
+    _executar(_listar_usuarios())
+
+
+@cli.command("delete", help="Exclui um usuário.")
+def excluir(username: str = typer.Option(None, help="Nome de usuário")):
+    if not username:
+        print("Nome de usuário é necessário para excluir um usuário.")
+        return
+    _executar(_excluir_usuario(username))
 
 
 if __name__ == "__main__":
-    main()
+    cli()
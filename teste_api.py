@@ -1,11 +1,13 @@
-import requests
+import asyncio
 
-# URL do endpoint de token
-token_url = "http://127.0.0.1:8000/token"
-# URL do endpoint de veículos
-veiculo_url = "http://127.0.0.1:8000/veiculos"
+import httpx
 
-def get_token(username: str, password: str):
+# URL base da API
+base_url = "http://127.0.0.1:8000"
+# Limites do pool de conexões: as conexões (e a sessão TLS, se houver) são reutilizadas entre requests
+limites = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str):
     """
     Obtém um token de acesso JWT usando o nome de usuário e senha fornecidos.
     """
@@ -14,17 +16,17 @@ def get_token(username: str, password: str):
         "password": password
     }
 
-    response = requests.post(token_url, data=data)
+    response = await client.post("/token", data=data)
     response.raise_for_status()
     return response.json()
 
-def criar_veiculo(token: str, marca: str, modelo: str, ano: int, placa: str, status: str):
+async def criar_veiculo(client: httpx.AsyncClient, token: str, marca: str, modelo: str, ano: int, placa: str,
+                        status: str):
     """
     Cria um novo veículo usando o token de acesso JWT.
     """
     headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
+        "Authorization": f"Bearer {token}"
     }
     veiculo_data = {
         "marca": marca,
@@ -33,34 +35,41 @@ def criar_veiculo(token: str, marca: str, modelo: str, ano: int, placa: str, sta
         "placa": placa,
         "status": status
     }
-    response = requests.post(veiculo_url, json=veiculo_data, headers=headers)
+    response = await client.post("/veiculos", json=veiculo_data, headers=headers)
     return response
 
-def main():
+async def criar_veiculos(client: httpx.AsyncClient, token: str, veiculos: list[dict]):
+    """
+    Cria vários veículos em paralelo, multiplexados sobre as conexões já abertas do cliente.
+    """
+    return await asyncio.gather(*(criar_veiculo(client, token, **veiculo) for veiculo in veiculos))
+
+async def main():
     username = "usuario_teste"  # Nome de usuário válido
     password = "teste12345"     # Senha válida
 
-    try:
-        token_response = get_token(username, password)
-        print(f"Token recebido: {token_response}")
-
-        # Teste de criação de veículo
+    # Um único cliente para todos os requests (HTTP/2 quando o servidor suportar)
+    async with httpx.AsyncClient(http2=True, base_url=base_url, limits=limites) as client:
         try:
-            response = criar_veiculo(
-                token=token_response['access_token'],
-                marca="Fiat",
-                modelo="Uno",
-                ano=2022,
-                placa="ABC1234",
-                status="CONNECTADO"  # Status corrigido
-            )
-            response.raise_for_status()
-            print(f"Resposta ao criar veículo: {response.json()}")
-        except requests.exceptions.HTTPError as e:
-            print(f"Erro ao criar veículo: {e}")
+            token_response = await get_token(client, username, password)
+            print(f"Token recebido: {token_response}")
+
+            # Teste de criação de veículos: um pequeno lote enviado em paralelo
+            veiculos = [
+                {"marca": "Fiat", "modelo": "Uno", "ano": 2022, "placa": "ABC1234", "status": "CONNECTADO"},
+                {"marca": "VW", "modelo": "Gol", "ano": 2021, "placa": "DEF5G67", "status": "DESCONECTADO"},
+                {"marca": "Ford", "modelo": "Ka", "ano": 2020, "placa": "HIJ8901", "status": "CONNECTADO"},
+            ]
+            respostas = await criar_veiculos(client, token_response['access_token'], veiculos)
+            for veiculo, response in zip(veiculos, respostas):
+                try:
+                    response.raise_for_status()
+                    print(f"Resposta ao criar veículo {veiculo['placa']}: {response.json()}")
+                except httpx.HTTPStatusError as e:
+                    print(f"Erro ao criar veículo {veiculo['placa']}: {e}")
 
-    except requests.exceptions.HTTPError as e:
-        print(f"Erro ao obter token: {e}")
+        except httpx.HTTPStatusError as e:
+            print(f"Erro ao obter token: {e}")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())